@@ -12,10 +12,13 @@ import os
 import sys
 import re
 import textwrap
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Preformatted, PageBreak
-from reportlab.lib.units import inch
+import functools
+import collections
+import concurrent.futures
+import hashlib
+import mmap
+import tempfile
+import threading
 
 # ==========================
 # Configuration Variables
@@ -48,6 +51,10 @@ SKIP_LIST = [
     'frontend/package-lock.json',
 ]
 
+# SKIP_LIST as a set, for the exact POSIX relative path matches checked during the walk. Nested
+# matches need no check of their own, since skipped directories are never descended into.
+SKIP_EXACT = frozenset(SKIP_LIST)
+
 # Set to True to remove code comments based on file extension; otherwise, leave them intact.
 REMOVE_COMMENTS = False
 
@@ -57,221 +64,588 @@ SKIP_HIDDEN = False
 # Maximum width for code lines (in characters)
 MAX_LINE_WIDTH = 100
 
+# Maximum number of workers used to read and process files concurrently: threads, or processes
+# when comments are stripped from enough files to use several CPUs
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Set to True to reuse processed file contents from previous runs, cached in CACHE_DIR.
+# Each file has one entry per REMOVE_COMMENTS setting, reused while its modification time and size
+# are unchanged and overwritten otherwise.
+USE_CACHE = False
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'codebase_to_pdf')
+
 # ==========================
 # Helper Functions
 # ==========================
 
-def should_skip(rel_path):
+# Precompiled comment patterns, one per family of file extensions. They operate on raw file bytes,
+# so contents only need decoding once comments are gone.
+# Block comments use unrolled character-class loops rather than lazy '.*?' scans, so the engine
+# advances through comment bodies without backtracking.
+_BLOCK_COMMENT = re.compile(rb'/\*[^*]*\*+(?:[^/*][^*]*\*+)*/')
+_HASH_COMMENT = re.compile(rb'#.*')
+_HTML_COMMENT = re.compile(rb'<!--[^-]*(?:-(?!->)[^-]*)*-->')
+# Block and line comments in one alternation, so the input is scanned once instead of twice
+_C_STYLE_COMMENT = re.compile(_BLOCK_COMMENT.pattern + rb'|//[^\n]*')
+# PHP accepts all three comment styles; whichever starts first wins, as it does when PHP lexes them
+_PHP_COMMENT = re.compile(_C_STYLE_COMMENT.pattern + rb'|#[^\n]*')
+
+# C-family sources are stripped in a single scan that steps over string literals, so comment markers
+# inside strings (such as "http://...") are left alone. Each match is a run of code up to the next
+# comment, and the stripped source is the concatenation of those runs. Every character outside a
+# comment belongs to exactly one branch of the run, so the scan never backtracks; the run is capped
+# so the engine's per-iteration state stays small on large files.
+_DOUBLE_QUOTED = rb'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+_SINGLE_QUOTED = rb"'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+_BACKTICK_QUOTED = rb'`[^`\\]*(?:\\.[^`\\]*)*`'
+
+def _code_runs(strings, quotes):
+    """
+    Compile a pattern matching a run of code, with the given string literals, and the comment ending it.
     """
-    Determine if a given relative path should be skipped.
+    code = (rb'(?:[^' + quotes + rb'/]+|' + rb'|'.join(strings) + rb'|[' + quotes + rb']'
+            rb'|/(?!/|' + _BLOCK_COMMENT.pattern[1:] + rb')){0,1024}')
+    return re.compile(rb'(' + code + rb')(?:' + _BLOCK_COMMENT.pattern + rb'|//[^\n]*)?', re.DOTALL)
 
-    Converts the path to POSIX style and checks for an exact match or a nested match in SKIP_LIST.
-    Additionally, if SKIP_HIDDEN is True, any file or directory whose basename starts with '.' is skipped.
+_C_FAMILY_CODE = _code_runs((_DOUBLE_QUOTED, _SINGLE_QUOTED), rb'"' + rb"'")
+# JavaScript, TypeScript and Go also delimit strings with backticks, which may span lines
+_BACKTICK_FAMILY_CODE = _code_runs((_DOUBLE_QUOTED, _SINGLE_QUOTED, _BACKTICK_QUOTED), rb'"' + rb"'`")
+
+_BLOCK_MARKERS = (b'/*',)
+_SLASH_MARKERS = (b'//',)
+_HASH_MARKERS = (b'#',)
+
+def _make_stripper(markers, pattern, keep_matches=False):
+    """
+    Build a function removing the comments matched by pattern from raw code bytes.
+    With keep_matches, pattern instead matches the code between comments, which is all that is kept.
+    The pattern only runs on code containing at least one of the markers, since a substring
+    search is far cheaper than a regex scan that finds nothing.
     """
-    posix_rel_path = rel_path.replace(os.sep, '/')
-    if SKIP_HIDDEN and os.path.basename(posix_rel_path).startswith('.'):
-        return True
-    for skip in SKIP_LIST:
-        if posix_rel_path == skip or posix_rel_path.startswith(skip + '/'):
-            return True
-    return False
+    if keep_matches:
+        findall = pattern.findall
+        strip_all = lambda code: b''.join(findall(code))
+    else:
+        sub = pattern.sub
+        strip_all = lambda code: sub(b'', code)
+
+    def strip(code):
+        # find() rather than 'in', since 'in' on a memory-mapped file only tests for a single byte
+        for marker in markers:
+            if code.find(marker) != -1:
+                return strip_all(code)
+        return code
+
+    return strip
+
+_strip_c_family = _make_stripper(_BLOCK_MARKERS + _SLASH_MARKERS, _C_FAMILY_CODE, keep_matches=True)
+_strip_backtick_family = _make_stripper(_BLOCK_MARKERS + _SLASH_MARKERS, _BACKTICK_FAMILY_CODE, keep_matches=True)
+_strip_c_style = _make_stripper(_BLOCK_MARKERS + _SLASH_MARKERS, _C_STYLE_COMMENT)
+_strip_hash_style = _make_stripper(_HASH_MARKERS, _HASH_COMMENT)
+_strip_html = _make_stripper((b'<!--',), _HTML_COMMENT)
+
+# Comment stripper for each file extension, specialized once at import time
+_STRIPPERS = {
+    **dict.fromkeys(['.js', '.ts', '.go'], _strip_backtick_family),
+    **dict.fromkeys(['.cpp', '.c', '.h', '.cs', '.java', '.swift', '.rs'], _strip_c_family),
+    **dict.fromkeys(['.py', '.rb', '.sh', '.bash'], _strip_hash_style),
+    '.html': _strip_html,
+    '.htm': _strip_html,
+    '.css': _make_stripper(_BLOCK_MARKERS, _BLOCK_COMMENT),
+    '.php': _make_stripper(_BLOCK_MARKERS + _SLASH_MARKERS + _HASH_MARKERS, _PHP_COMMENT),
+}
 
 def remove_comments(code, file_extension):
     """
-    Remove comments from a code string based on its file extension.
+    Remove comments from code based on the file extension, given as raw bytes or as a string.
+    Extensions without a specific rule fall back to C-style comments.
     Note: This is a best-effort approach and may not cover every edge case.
     """
-    ext = file_extension.lower()
-    if ext in ['.js', '.ts', '.cpp', '.c', '.h', '.cs', '.java', '.go', '.swift', '.rs']:
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        code = re.sub(r'//.*', '', code)
-    elif ext == '.py':
-        code = re.sub(r'#.*', '', code)
-    elif ext in ['.html', '.htm']:
-        code = re.sub(r'<!--.*?-->', '', code, flags=re.DOTALL)
-    elif ext == '.css':
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-    elif ext in ['.rb', '.sh', '.bash']:
-        code = re.sub(r'#.*', '', code)
-    elif ext == '.php':
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        code = re.sub(r'//.*', '', code)
-        code = re.sub(r'#.*', '', code)
-    else:
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-        code = re.sub(r'//.*', '', code)
-    return code
+    strip = _STRIPPERS.get(file_extension.lower(), _strip_c_style)
+    if isinstance(code, str):
+        return strip(code.encode('utf-8', 'surrogatepass')).decode('utf-8', 'surrogatepass')
+    return strip(code)
+
+@functools.lru_cache(maxsize=256)
+def _line_wrapper(max_width, indent):
+    """
+    Return a shared TextWrapper for the content of a long line with the given indentation.
+    """
+    return textwrap.TextWrapper(
+        width=max_width - indent,
+        subsequent_indent=' ' * (indent + 4),  # Add 4 spaces extra indent for continuation
+        break_long_words=False,
+        break_on_hyphens=False
+    )
 
 def wrap_long_lines(code, max_width=MAX_LINE_WIDTH):
     """
     Wrap long lines of code to prevent them from being cut off in the output.
     """
+    # Most files have no line over the limit and can be returned untouched
+    if len(code) <= max_width:
+        return code
     lines = code.split('\n')
+    if max(map(len, lines)) <= max_width:
+        return code
+    
     wrapped_lines = []
+    append = wrapped_lines.append
     
     for line in lines:
-        if len(line) > max_width:
-            # Preserve indentation for wrapped lines
-            indent = len(line) - len(line.lstrip())
-            indent_str = ' ' * (indent + 4)  # Add 4 spaces extra indent for continuation
-            
-            # Get the indented part
-            indented_part = line[:indent]
-            # Get the content part
-            content_part = line[indent:]
-            
-            # Wrap the content part
-            wrapped_content = textwrap.fill(
-                content_part,
-                width=max_width - indent,
-                subsequent_indent=indent_str,
-                break_long_words=False,
-                break_on_hyphens=False
-            )
-            
-            # Add the indented part back to the wrapped content
-            if wrapped_content.startswith(indent_str):
-                wrapped_lines.append(wrapped_content)
-            else:
-                wrapped_lines.append(indented_part + wrapped_content[indent:])
+        if len(line) <= max_width:
+            append(line)
+            continue
+        
+        # Preserve indentation for wrapped lines; the stripped line is the content part to wrap
+        content_part = line.lstrip()
+        indent = len(line) - len(content_part)
+        wrapper = _line_wrapper(max_width, indent)
+        
+        # Wrap the content part
+        wrapped_content = wrapper.fill(content_part)
+        
+        # Add the indented part back to the wrapped content
+        if wrapped_content.startswith(wrapper.subsequent_indent):
+            append(wrapped_content)
         else:
-            wrapped_lines.append(line)
+            append(line[:indent] + wrapped_content[indent:])
     
     return '\n'.join(wrapped_lines)
 
-def build_folder_tree(root):
+# Indentation strings for each folder tree depth, grown as deeper levels are reached
+_INDENTS = ['', '    ']
+
+def _indent(depth):
     """
-    Create a string that represents the folder structure starting at the root.
+    Return the folder tree indentation for a depth, extending the table the first time a depth is seen.
     """
-    tree_lines = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        rel_dir = os.path.relpath(dirpath, root)
-        if rel_dir == '.':
-            rel_dir = ''
-        # Filter out directories to skip
-        dirnames[:] = [d for d in dirnames if not should_skip(os.path.join(rel_dir, d))]
-        depth = rel_dir.count(os.sep) if rel_dir else 0
-        indent = '    ' * depth
-        dir_display = os.path.basename(dirpath) if rel_dir else os.path.basename(os.path.abspath(root))
-        tree_lines.append(f"{indent}{dir_display}/")
-        for f in filenames:
-            file_rel = os.path.join(rel_dir, f) if rel_dir else f
-            if should_skip(file_rel):
-                continue
-            tree_lines.append(f"{indent}    {f}")
-    return "\n".join(tree_lines)
-
-def gather_files(root):
-    """
-    Recursively collect all file paths in the codebase that are not in SKIP_LIST.
+    while len(_INDENTS) <= depth:
+        _INDENTS.append(_INDENTS[-1] + '    ')
+    return _INDENTS[depth]
+
+def _walk(root):
+    """
+    Walk a directory tree top-down like os.walk, yielding (rel_path, name, full_path, depth) tuples.
+    depth is the folder tree indentation level for directories and None for files; rel_path is POSIX
+    style. Skipped and hidden entries are pruned, and symlinked directories are not descended into.
+    """
+    stack = [(root, '', os.path.basename(os.path.abspath(root)), 0)]
+    while stack:
+        dirpath, relprefix, name, depth = stack.pop()
+        try:
+            scandir_it = os.scandir(dirpath)
+        except OSError:
+            continue
+        yield relprefix[:-1], name, dirpath, depth
+        # Top-level directories share the root's indentation level
+        subdir_depth = depth + 1 if relprefix else depth
+        subdirs = []
+        with scandir_it:
+            for entry in scandir_it:
+                if SKIP_HIDDEN and entry.name[0] == '.':
+                    continue
+                rel = relprefix + entry.name
+                # Ancestors matching SKIP_LIST were pruned already, so only exact matches remain possible
+                if rel in SKIP_EXACT:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, rel + '/', entry.name, subdir_depth))
+                elif not (entry.is_symlink() and entry.is_dir()):
+                    yield rel, entry.name, entry.path, None
+        # Pushed in reverse so they are popped, and walked, in scan order
+        stack.extend(reversed(subdirs))
+
+def scan_tree(root, collect_files=True):
     """
+    Scan the codebase once, returning the folder structure string and the list of files to export.
+    Files are given as (full_path, rel_path) tuples, with rel_path in POSIX style. When
+    collect_files is False, only the folder structure is built and the list is left empty.
+    """
+    tree_lines = []
+    add_line = tree_lines.append
     file_entries = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        rel_dir = os.path.relpath(dirpath, root)
-        if rel_dir == '.':
-            rel_dir = ''
-        # Exclude directories to skip
-        dirnames[:] = [d for d in dirnames if not should_skip(os.path.join(rel_dir, d))]
-        for f in filenames:
-            file_rel = os.path.join(rel_dir, f) if rel_dir else f
-            if should_skip(file_rel):
-                continue
-            full_path = os.path.join(dirpath, f)
-            file_entries.append(full_path)
-    return file_entries
+    file_indent = ''
+    for rel, name, full_path, depth in _walk(root):
+        if depth is not None:
+            add_line(_indent(depth) + name + '/')
+            file_indent = _indent(depth + 1)
+        else:
+            add_line(file_indent + name)
+            if collect_files:
+                file_entries.append((full_path, rel))
+    return "\n".join(tree_lines), file_entries
+
+# Version of the processed contents, checked with every cache entry. Bump it whenever a change to
+# reading, comment stripping or decoding changes the content produced for the same file.
+_CACHE_VERSION = 2
+
+def _cache_file(filepath):
+    """
+    Return the path of a file's cache entry and the header identifying the file's current state.
+    Each file has a single entry per REMOVE_COMMENTS setting, overwritten when the file changes.
+    """
+    st = os.stat(filepath)
+    name = f"{os.path.abspath(filepath)}\0{REMOVE_COMMENTS}"
+    header = f"{_CACHE_VERSION} {st.st_mtime_ns} {st.st_size}\n".encode('ascii')
+    return os.path.join(CACHE_DIR, hashlib.sha256(name.encode('utf-8', 'surrogateescape')).hexdigest()), header
+
+def _store_cache_file(cache_file, header, content):
+    """
+    Atomically write a cache entry, ignoring any failure since the cache is only an optimization.
+    """
+    tmp_path = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR)
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(header)
+            tmp_file.write(content.encode('utf-8'))
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+# Files at least this large are memory-mapped rather than read into memory
+_MMAP_MIN_SIZE = 64 * 1024
+
+# Files are read through raw file descriptors; O_BINARY only exists, and only matters, on Windows
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+
+def _map_file(fd, size):
+    """
+    Memory-map a large open file for sequential reading, returning None for small or unmappable files.
+    """
+    if size < _MMAP_MIN_SIZE:
+        return None
+    try:
+        mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+    return mapped
+
+def _read_fd(fd, size):
+    """
+    Read an open file to the end, expecting it to hold size bytes.
+    """
+    data = os.read(fd, size)
+    # A read may return fewer bytes than asked for, and the file may have grown since it was
+    # measured, so keep reading until end of file; usually the second read already hits it.
+    chunks = None
+    remaining = size - len(data)
+    while True:
+        chunk = os.read(fd, max(remaining, 64 * 1024))
+        if not chunk:
+            return data if chunks is None else b''.join(chunks)
+        if chunks is None:
+            chunks = [data]
+        chunks.append(chunk)
+        remaining -= len(chunk)
+
+def _normalize_newlines(data):
+    """
+    Convert CRLF and lone CR line endings to LF, the way text mode would.
+    """
+    if data.find(b'\r') == -1:
+        return data
+    return data[:].replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+# Stripped contents of the files seen by the current process_files call, keyed by extension and
+# SHA-256 of the raw bytes, so identical files such as vendored copies are only stripped once.
+# Kept text is capped at a total size; the lock guards the table and its size across reader threads.
+_MAX_STRIPPED_CHARS = 16 * 1024 * 1024
+_STRIPPED_CONTENTS = {}
+_STRIPPED_LOCK = threading.Lock()
+_stripped_chars = 0
+
+def _remember_stripped(key, content):
+    """
+    Keep a file's stripped content for later copies of the same file, while under the size cap.
+    """
+    global _stripped_chars
+    with _STRIPPED_LOCK:
+        if key not in _STRIPPED_CONTENTS and _stripped_chars + len(content) <= _MAX_STRIPPED_CHARS:
+            _STRIPPED_CONTENTS[key] = content
+            _stripped_chars += len(content)
+
+def _forget_stripped():
+    """
+    Drop the stripped contents kept from previous files.
+    """
+    global _stripped_chars
+    with _STRIPPED_LOCK:
+        _STRIPPED_CONTENTS.clear()
+        _stripped_chars = 0
 
 def process_file(filepath):
     """
     Read a file's content and optionally remove comments.
+    When USE_CACHE is True, the result of a previous run is reused if the file is unchanged.
     """
+    cache_file = None
+    if USE_CACHE:
+        try:
+            cache_file, cache_header = _cache_file(filepath)
+            with open(cache_file, 'rb') as cached:
+                if cached.readline() == cache_header:
+                    return cached.read().decode('utf-8')
+        except (OSError, UnicodeDecodeError):
+            pass
     try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            content = file.read()
-    except Exception as e:
-        content = f"Error reading file: {e}"
-    if REMOVE_COMMENTS:
-        _, ext = os.path.splitext(filepath)
-        content = remove_comments(content, ext)
+        # Small files are fetched with a single read on a raw descriptor, skipping the file object
+        # machinery entirely. Large files are memory-mapped instead, so the kernel pages them in on
+        # demand and comment stripping or decoding works on the mapping without an intermediate copy.
+        fd = os.open(filepath, _OPEN_FLAGS)
+        try:
+            size = os.fstat(fd).st_size
+            mapped = _map_file(fd, size)
+            data = _read_fd(fd, size) if mapped is None else mapped
+        finally:
+            os.close(fd)
+    except OSError as e:
+        # Decoding never fails, as undecodable bytes are replaced, so only I/O errors remain
+        return f"Error reading file: {e}"
+    try:
+        if REMOVE_COMMENTS:
+            ext = os.path.splitext(filepath)[1].lower()
+            key = (ext, hashlib.sha256(data).digest())
+            content = _STRIPPED_CONTENTS.get(key)
+            if content is None:
+                content = str(remove_comments(_normalize_newlines(data), ext), 'utf-8', 'replace')
+                _remember_stripped(key, content)
+        else:
+            content = str(_normalize_newlines(data), 'utf-8', 'replace')
+    finally:
+        if mapped is not None:
+            mapped.close()
+    if cache_file:
+        _store_cache_file(cache_file, cache_header, content)
     return content
 
+def _init_worker(remove_comments, use_cache, cache_dir):
+    """
+    Apply the parent's settings in a worker process, which does not inherit them when spawned.
+    """
+    global REMOVE_COMMENTS, USE_CACHE, CACHE_DIR
+    REMOVE_COMMENTS, USE_CACHE, CACHE_DIR = remove_comments, use_cache, cache_dir
+
+def _process_chunk(filepaths, max_width):
+    """
+    Process and wrap a batch of files in a worker, returning their contents in order.
+    """
+    return [wrap_long_lines(process_file(filepath), max_width) for filepath in filepaths]
+
+# Minimum number of files per worker process, so the cost of starting a process is amortized
+_FILES_PER_PROCESS = 64
+
+def process_files(files, max_width=MAX_LINE_WIDTH):
+    """
+    Read, process and wrap a list of files concurrently, yielding their contents in the original order.
+    Uses threads, or processes when stripping comments from enough files; only a bounded number of
+    files are in flight at once.
+    """
+    _forget_stripped()
+    processes = 0
+    if REMOVE_COMMENTS:
+        processes = min(os.cpu_count() or 1, MAX_WORKERS, len(files) // _FILES_PER_PROCESS)
+    if processes > 1:
+        workers = processes
+        chunksize = max(1, min(32, len(files) // (workers * 4)))
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(REMOVE_COMMENTS, USE_CACHE, CACHE_DIR),
+        )
+    else:
+        workers = MAX_WORKERS
+        chunksize = 1
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        pending = collections.deque()
+        for start in range(0, len(files), chunksize):
+            pending.append(executor.submit(_process_chunk, files[start:start + chunksize], max_width))
+            if len(pending) > 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+# PDF page layout, in points, so ReportLab is only imported once a PDF is written:
+# US letter with half-inch side margins and one-inch top and bottom margins.
+_INCH = 72.0
+_PDF_PAGE_SIZE = (8.5 * _INCH, 11 * _INCH)
+_PDF_MARGIN_X = 0.5 * _INCH
+_PDF_MARGIN_Y = _INCH
+# Approximate characters per inch for Courier 8pt, and the resulting width of code lines
+_PDF_CHARS_PER_INCH = 12
+_PDF_MAX_CHARS = int((_PDF_PAGE_SIZE[0] - 2 * _PDF_MARGIN_X) / _INCH * _PDF_CHARS_PER_INCH)
+
+class _PdfWriter:
+    """
+    Draw headings and fixed-pitch code straight onto a ReportLab canvas, line by line.
+
+    This bypasses the Platypus flowable layout engine: all lines of a page go into a single text
+    object, consecutive lines advancing with textLine, and a new page is started whenever the
+    bottom margin is reached. Nothing but the current page is held in memory.
+    """
+    def __init__(self, output_file, pagesize=_PDF_PAGE_SIZE, margin_x=_PDF_MARGIN_X, margin_y=_PDF_MARGIN_Y, padding=6):
+        from reportlab.lib.utils import simpleSplit
+        from reportlab.pdfgen.canvas import Canvas
+        self.canv = Canvas(output_file, pagesize=pagesize)
+        self._split = simpleSplit
+        self.left = margin_x + padding
+        self.width = pagesize[0] - 2 * (margin_x + padding)
+        self.top = pagesize[1] - margin_y - padding
+        self.bottom = margin_y + padding
+        self.y = self.top
+        self.text = None
+        self.font = None
+        self.next_baseline = None
+
+    def _draw_line(self, text, font_name, font_size, leading):
+        self.ensure_space(leading)
+        if self.text is None:
+            self.text = self.canv.beginText()
+        if self.font != (font_name, font_size, leading):
+            self.text.setFont(font_name, font_size, leading)
+            self.font = (font_name, font_size, leading)
+        # Only reposition when something other than the previous line moved the cursor
+        baseline = self.y - font_size
+        if baseline != self.next_baseline:
+            self.text.setTextOrigin(self.left, baseline)
+        self.text.textLine(text)
+        self.next_baseline = baseline - leading
+        self.y -= leading
+
+    def _flush_text(self):
+        if self.text is not None:
+            self.canv.drawText(self.text)
+            self.text = None
+            self.font = None
+            self.next_baseline = None
+
+    def page_break(self):
+        """
+        Finish the current page, unless nothing has been drawn on it yet.
+        """
+        if self.y < self.top:
+            self._flush_text()
+            self.canv.showPage()
+            self.y = self.top
+
+    def ensure_space(self, height):
+        """
+        Start a new page if less than height points are left on the current one.
+        """
+        if self.y - height < self.bottom:
+            self.page_break()
+
+    def lines_per_page(self, leading=10):
+        """
+        Return how many lines of the given leading fit on a full page.
+        """
+        return int((self.top - self.bottom) // leading)
+
+    def separator(self, space=0.2*_INCH):
+        """
+        Draw a horizontal rule between two files sharing a page.
+        """
+        if self.y - space < self.bottom:
+            self.page_break()
+            return
+        self.y -= space / 2
+        self.canv.setLineWidth(0.5)
+        self.canv.line(self.left, self.y, self.left + self.width, self.y)
+        self.y -= space / 2
+
+    def heading(self, text, font_size, leading, space_after=6, keep_with_next=30):
+        """
+        Draw a bold heading, wrapping it to the page width.
+        The heading moves to a new page unless keep_with_next points of content fit below it.
+        """
+        lines = self._split(text, 'Helvetica-Bold', font_size, self.width)
+        self.ensure_space(len(lines) * leading + space_after + keep_with_next)
+        for line in lines:
+            self._draw_line(line, 'Helvetica-Bold', font_size, leading)
+        self.y -= space_after
+
+    def code(self, text, font_size=8, leading=10):
+        """
+        Draw already wrapped code text in Courier, one line per row, returning the number of lines.
+        """
+        lines = text.strip('\n').split('\n')
+        for line in lines:
+            self._draw_line(line, 'Courier', font_size, leading)
+        return len(lines)
+
+    def save(self):
+        self._flush_text()
+        self.canv.save()
+
 def generate_pdf(root_folder, output_file, structure_only=False):
     """
     Generate a PDF document containing the folder structure and optionally the file contents.
     """
-    # Create folder structure overview
-    folder_tree = build_folder_tree(root_folder)
-    
-    # Initialize PDF document with ReportLab
-    doc = SimpleDocTemplate(output_file, pagesize=letter, leftMargin=0.5*inch, rightMargin=0.5*inch)
-    styles = getSampleStyleSheet()
-    code_style = ParagraphStyle(
-        name='Code',
-        fontName='Courier',
-        fontSize=8,
-        leading=10,
-    )
+    # Scan the folder structure and the list of files to process in a single pass
+    folder_tree, files = scan_tree(root_folder, collect_files=not structure_only)
     
-    # Calculate available width for code in PDF
-    available_width = letter[0] - doc.leftMargin - doc.rightMargin
-    # Approximate characters per inch for Courier 8pt
-    chars_per_inch = 12
-    max_chars = int(available_width / inch * chars_per_inch)
-    
-    story = []
+    # Initialize PDF canvas with ReportLab
+    pdf = _PdfWriter(output_file)
     
     # Add folder structure to PDF
-    story.append(Paragraph("Folder Structure", styles['Heading1']))
-    wrapped_folder_tree = wrap_long_lines(folder_tree, max_chars)
-    story.append(Preformatted(wrapped_folder_tree, code_style))
+    pdf.heading("Folder Structure", 18, 22)
+    pdf.code(wrap_long_lines(folder_tree, _PDF_MAX_CHARS))
     
     if not structure_only:
-        story.append(PageBreak())
-        # Get list of files to process
-        files = gather_files(root_folder)
-        # Add each file's content to PDF
-        for filepath in files:
-            relative_path = os.path.relpath(filepath, root_folder)
-            story.append(Paragraph(relative_path, styles['Heading2']))
-            code_content = process_file(filepath)
-            wrapped_content = wrap_long_lines(code_content, max_chars)
-            story.append(Preformatted(wrapped_content, code_style))
-            story.append(PageBreak())
+        # Add each file's content to PDF. A file following one shorter than half a page shares
+        # its page, below a horizontal rule; otherwise it starts on a new page.
+        pdf.page_break()
+        small_file_lines = pdf.lines_per_page() // 2
+        previous_lines = None
+        contents = process_files([full_path for full_path, _ in files], _PDF_MAX_CHARS)
+        for (_, relative_path), wrapped_content in zip(files, contents):
+            if previous_lines is not None:
+                if previous_lines < small_file_lines:
+                    pdf.separator()
+                else:
+                    pdf.page_break()
+            pdf.heading(relative_path, 14, 18)
+            previous_lines = pdf.code(wrapped_content)
     
-    # Build the PDF file
-    doc.build(story)
+    # Write the PDF file
+    pdf.save()
     print(f"PDF generated successfully: {output_file}")
 
 def generate_txt(root_folder, output_file, structure_only=False):
     """
     Generate a TXT document containing the folder structure and optionally the file contents.
     """
-    # Create folder structure overview
-    folder_tree = build_folder_tree(root_folder)
+    # Scan the folder structure and the list of files to process in a single pass
+    folder_tree, files = scan_tree(root_folder, collect_files=not structure_only)
     wrapped_folder_tree = wrap_long_lines(folder_tree)
     
-    # Get list of files to process (if needed)
-    files = gather_files(root_folder) if not structure_only else []
-    
-    with open(output_file, 'w', encoding='utf-8') as txt_file:
+    # Output is written as bytes through a single buffered file, with separators prebuilt once.
+    # Text is encoded with surrogateescape so undecodable file names keep their original bytes.
+    rule = b"=" * 80 + b"\n"
+    with open(output_file, 'wb') as txt_file:
         # Write folder structure
-        txt_file.write("=" * 80 + "\n")
-        txt_file.write("FOLDER STRUCTURE\n")
-        txt_file.write("=" * 80 + "\n\n")
-        txt_file.write(wrapped_folder_tree)
-        txt_file.write("\n\n")
+        txt_file.writelines((
+            rule, b"FOLDER STRUCTURE\n", rule, b"\n",
+            wrapped_folder_tree.encode('utf-8', 'surrogateescape'), b"\n\n",
+        ))
         
         # Write each file's content if structure_only is False
         if not structure_only:
-            for filepath in files:
-                relative_path = os.path.relpath(filepath, root_folder)
-                txt_file.write("=" * 80 + "\n")
-                txt_file.write(f"FILE: {relative_path}\n")
-                txt_file.write("=" * 80 + "\n\n")
-                
-                code_content = process_file(filepath)
-                wrapped_content = wrap_long_lines(code_content)
-                txt_file.write(wrapped_content)
-                txt_file.write("\n\n")
+            contents = process_files([full_path for full_path, _ in files])
+            for (_, relative_path), wrapped_content in zip(files, contents):
+                txt_file.writelines((
+                    rule, b"FILE: ", relative_path.encode('utf-8', 'surrogateescape'), b"\n", rule, b"\n",
+                    wrapped_content.encode('utf-8', 'surrogateescape'), b"\n\n",
+                ))
     
     print(f"TXT file generated successfully: {output_file}")
 
@@ -285,16 +659,17 @@ def main():
       --remove-comments   Remove comments from code files.
       --structure-only    Export only the folder structure.
       --skip-hidden       Skip all hidden files (starting with '.').
+      --cache             Reuse processed file contents cached by previous runs.
     """
     if len(sys.argv) < 3:
-        print("Usage: python codebase_export.py <codebase_folder> <output_file> [--remove-comments] [--structure-only] [--skip-hidden]")
+        print("Usage: python codebase_export.py <codebase_folder> <output_file> [--remove-comments] [--structure-only] [--skip-hidden] [--cache]")
         print("  Output format is automatically determined based on file extension (.pdf or .txt)")
         sys.exit(1)
     
     root_folder = sys.argv[1]
     output_file = sys.argv[2]
     
-    global REMOVE_COMMENTS, SKIP_HIDDEN
+    global REMOVE_COMMENTS, SKIP_HIDDEN, USE_CACHE
     structure_only = False
 
     # Parse optional arguments
@@ -305,6 +680,8 @@ def main():
             structure_only = True
         elif arg == "--skip-hidden":
             SKIP_HIDDEN = True
+        elif arg == "--cache":
+            USE_CACHE = True
     
     # Determine output format based on file extension
     _, ext = os.path.splitext(output_file)